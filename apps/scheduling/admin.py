@@ -7,8 +7,13 @@ from django.db.models import QuerySet
 from .models import AvailabilityException, AvailabilityRule, Booking, Resource
 
 
-def _is_manager(user) -> bool:
-    return user.is_authenticated and user.groups.filter(name="manager").exists()
+def _is_manager(request) -> bool:
+    cached = getattr(request, "_is_mgr", None)
+    if cached is None:
+        user = request.user
+        cached = user.is_authenticated and user.groups.filter(name="manager").exists()
+        request._is_mgr = cached
+    return cached
 
 
 @admin.register(Resource)
@@ -19,14 +24,14 @@ class ResourceAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request) -> QuerySet:
         qs = super().get_queryset(request)
-        if request.user.is_superuser or request.user.is_staff and not _is_manager(request.user):
+        if request.user.is_superuser or request.user.is_staff and not _is_manager(request):
             return qs
-        if _is_manager(request.user):
+        if _is_manager(request):
             return qs.filter(owner=request.user)
         return qs.none()
 
     def save_model(self, request, obj, form, change) -> None:
-        if not change and _is_manager(request.user):
+        if not change and _is_manager(request):
             obj.owner = request.user
         super().save_model(request, obj, form, change)
 
@@ -34,19 +39,20 @@ class ResourceAdmin(admin.ModelAdmin):
 @admin.register(AvailabilityRule)
 class AvailabilityRuleAdmin(admin.ModelAdmin):
     list_display = ("resource", "weekday", "start_time_local", "end_time_local", "is_active")
+    list_select_related = ("resource",)
     list_filter = ("weekday", "is_active")
     search_fields = ("resource__name",)
 
     def get_queryset(self, request) -> QuerySet:
-        qs = super().get_queryset(request).select_related("resource", "resource__owner")
-        if request.user.is_superuser or request.user.is_staff and not _is_manager(request.user):
+        qs = super().get_queryset(request).select_related("resource")
+        if request.user.is_superuser or request.user.is_staff and not _is_manager(request):
             return qs
-        if _is_manager(request.user):
+        if _is_manager(request):
             return qs.filter(resource__owner=request.user)
         return qs.none()
 
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
-        if db_field.name == "resource" and _is_manager(request.user):
+        if db_field.name == "resource" and _is_manager(request):
             kwargs["queryset"] = Resource.objects.filter(owner=request.user)
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
@@ -54,19 +60,20 @@ class AvailabilityRuleAdmin(admin.ModelAdmin):
 @admin.register(AvailabilityException)
 class AvailabilityExceptionAdmin(admin.ModelAdmin):
     list_display = ("resource", "date_local", "is_closed", "start_time_local", "end_time_local")
+    list_select_related = ("resource",)
     list_filter = ("is_closed", "date_local")
     search_fields = ("resource__name",)
 
     def get_queryset(self, request) -> QuerySet:
-        qs = super().get_queryset(request).select_related("resource", "resource__owner")
-        if request.user.is_superuser or request.user.is_staff and not _is_manager(request.user):
+        qs = super().get_queryset(request).select_related("resource")
+        if request.user.is_superuser or request.user.is_staff and not _is_manager(request):
             return qs
-        if _is_manager(request.user):
+        if _is_manager(request):
             return qs.filter(resource__owner=request.user)
         return qs.none()
 
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
-        if db_field.name == "resource" and _is_manager(request.user):
+        if db_field.name == "resource" and _is_manager(request):
             kwargs["queryset"] = Resource.objects.filter(owner=request.user)
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
@@ -74,13 +81,14 @@ class AvailabilityExceptionAdmin(admin.ModelAdmin):
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
     list_display = ("id", "resource", "user", "starts_at_utc", "created_at_utc")
+    list_select_related = ("resource", "user")
     search_fields = ("resource__name", "user__email")
     list_filter = ("resource",)
 
     def get_queryset(self, request) -> QuerySet:
-        qs = super().get_queryset(request).select_related("resource", "resource__owner", "user")
-        if request.user.is_superuser or request.user.is_staff and not _is_manager(request.user):
+        qs = super().get_queryset(request).select_related("resource", "user")
+        if request.user.is_superuser or request.user.is_staff and not _is_manager(request):
             return qs
-        if _is_manager(request.user):
+        if _is_manager(request):
             return qs.filter(resource__owner=request.user)
         return qs.none()
\ No newline at end of file
@@ -1,14 +1,15 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, time, timedelta
+from datetime import timezone as dt_timezone
 from zoneinfo import ZoneInfo
 
 from django import forms
 from django.conf import settings
 from django.utils import timezone
 
-from .models import Resource
-from .services import get_tz, list_available_slots
+from .models import AvailabilityException, AvailabilityRule, Booking, Resource
+from .services import get_tz
 
 
 class BookingCreateForm(forms.Form):
@@ -29,13 +30,48 @@ class BookingCreateForm(forms.Form):
     def clean_starts_at_utc(self) -> datetime:
         dt = self.cleaned_data["starts_at_utc"]
         if timezone.is_naive(dt):
-            dt = dt.replace(tzinfo=timezone.utc)
+            dt = dt.replace(tzinfo=dt_timezone.utc)
 
         if dt < timezone.now():
             raise forms.ValidationError("Slot is in the past.")
 
-        available = {s.starts_utc for s in list_available_slots(self.resource, days_ahead=21)}
-        if dt not in available:
+        local = dt.astimezone(get_tz())
+        day = local.date()
+        if day >= timezone.localdate() + timedelta(days=21):
             raise forms.ValidationError("Slot is not available.")
 
-        return dt
\ No newline at end of file
+        exception = (
+            AvailabilityException.objects.filter(resource=self.resource, date_local=day)
+            .only("is_closed", "start_time_local", "end_time_local")
+            .first()
+        )
+        if exception is not None and exception.is_closed:
+            raise forms.ValidationError("Slot is not available.")
+
+        windows = [
+            (rule.start_time_local, rule.end_time_local)
+            for rule in AvailabilityRule.objects.filter(
+                resource=self.resource,
+                weekday=day.weekday(),
+                is_active=True,
+            ).only("start_time_local", "end_time_local")
+        ]
+        if windows and exception is not None and exception.start_time_local and exception.end_time_local:
+            windows = [(exception.start_time_local, exception.end_time_local)]
+
+        if not any(_on_slot_grid(local, start_t, end_t) for start_t, end_t in windows):
+            raise forms.ValidationError("Slot is not available.")
+
+        if Booking.objects.filter(resource=self.resource, starts_at_utc=dt).exists():
+            raise forms.ValidationError("Slot is not available.")
+
+        return dt
+
+
+def _on_slot_grid(local: datetime, start_t: time, end_t: time) -> bool:
+    slot = local.replace(tzinfo=None)
+    start_dt = datetime.combine(slot.date(), start_t)
+    end_dt = datetime.combine(slot.date(), end_t)
+    if slot < start_dt or slot + timedelta(minutes=45) > end_dt:
+        return False
+    return (slot - start_dt) % timedelta(minutes=45) == timedelta(0)
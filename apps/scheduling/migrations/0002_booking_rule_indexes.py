@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-15 21:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduling', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='availabilityrule',
+            index=models.Index(fields=['resource', 'is_active', 'weekday'], name='idx_rule_resource_active_wday'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', 'starts_at_utc'], name='idx_booking_user_starts_at_utc'),
+        ),
+    ]
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import uuid
-from datetime import date, datetime, time, timedelta
+from datetime import date, datetime, time, timedelta, tzinfo
 from datetime import timezone as dt_timezone
+from functools import lru_cache
 from zoneinfo import ZoneInfo
 
 from django.conf import settings
@@ -12,6 +13,8 @@ from django.utils import timezone
 
 User = get_user_model()
 
+LOCAL_TZ = ZoneInfo(getattr(settings, "TIME_ZONE", "Europe/Berlin"))
+
 
 class Resource(models.Model):
     owner = models.ForeignKey(
@@ -51,6 +54,12 @@ class AvailabilityRule(models.Model):
     is_active = models.BooleanField(default=True)
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=["resource", "is_active", "weekday"],
+                name="idx_rule_resource_active_wday",
+            )
+        ]
         ordering = ["resource_id", "weekday", "start_time_local"]
 
     def __str__(self) -> str:
@@ -103,6 +112,12 @@ class Booking(models.Model):
                 name="uniq_booking_resource_starts_at_utc",
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["user", "starts_at_utc"],
+                name="idx_booking_user_starts_at_utc",
+            )
+        ]
         ordering = ["-starts_at_utc"]
 
     def __str__(self) -> str:
@@ -113,12 +128,10 @@ class Booking(models.Model):
         return self.starts_at_utc + timedelta(minutes=45)
 
     def starts_at_local(self) -> datetime:
-        tz = ZoneInfo(getattr(settings, "TIME_ZONE", "Europe/Berlin"))
-        return timezone.localtime(self.starts_at_utc, tz)
+        return timezone.localtime(self.starts_at_utc, LOCAL_TZ)
 
     def ends_at_local(self) -> datetime:
-        tz = ZoneInfo(getattr(settings, "TIME_ZONE", "Europe/Berlin"))
-        return timezone.localtime(self.ends_at_utc, tz)
+        return timezone.localtime(self.ends_at_utc, LOCAL_TZ)
 
 
 def daterange(start_date: date, days: int) -> list[date]:
@@ -129,12 +142,21 @@ def to_utc(dt_local: datetime) -> datetime:
     return dt_local.astimezone(dt_timezone.utc)
 
 
-def slot_starts_local(day_local: date, start_t: time, end_t: time) -> list[datetime]:
-    start_dt = datetime.combine(day_local, start_t)
-    end_dt = datetime.combine(day_local, end_t)
-    slot = start_dt
-    out: list[datetime] = []
-    while slot + timedelta(minutes=45) <= end_dt:
-        out.append(slot)
-        slot = slot + timedelta(minutes=45)
-    return out
\ No newline at end of file
+def time_to_seconds(value: time) -> int:
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+@lru_cache(maxsize=256)
+def slot_offsets(start_t: time, end_t: time) -> tuple[int, ...]:
+    step = 45 * 60
+    return tuple(range(time_to_seconds(start_t), time_to_seconds(end_t) - step + 1, step))
+
+
+def slot_starts_local(
+    day_local: date,
+    start_t: time,
+    end_t: time,
+    tz: tzinfo | None = None,
+) -> list[datetime]:
+    midnight = datetime.combine(day_local, time.min, tzinfo=tz)
+    return [midnight + timedelta(seconds=offset) for offset in slot_offsets(start_t, end_t)]
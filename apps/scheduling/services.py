@@ -1,20 +1,24 @@
 from __future__ import annotations
 
+import logging
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
 from zoneinfo import ZoneInfo
 
-from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.mail import EmailMessage
-from django.db import IntegrityError, transaction
+from django.db import IntegrityError, close_old_connections, connection, connections, transaction
 from django.utils import timezone
 
 from .models import (
     AvailabilityException,
     AvailabilityRule,
     Booking,
+    LOCAL_TZ,
     Resource,
     daterange,
     slot_starts_local,
@@ -23,44 +27,117 @@ from .models import (
 
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
 
-@dataclass(frozen=True)
+_email_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="booking-email")
+
+
+@dataclass(frozen=True, slots=True)
 class Slot:
     starts_local: datetime
     starts_utc: datetime
 
 
 def get_tz() -> ZoneInfo:
-    return ZoneInfo(getattr(settings, "TIME_ZONE", "Europe/Berlin"))
+    return LOCAL_TZ
+
+
+SLOTS_CACHE_TIMEOUT = 300
+
+DAILY_BOOKING_LIMIT = 5
+
+BOOKING_EMAIL_DEDUP_TIMEOUT = 60 * 60 * 24
+
+
+def slots_cache_key(resource_id: int, generation: int) -> str:
+    return f"slots:{resource_id}:{generation}"
 
 
-def list_available_slots(resource: Resource, days_ahead: int = 14) -> list[Slot]:
+def _slots_generation_key(resource_id: int) -> str:
+    return f"slots_gen:{resource_id}"
+
+
+def bump_slots_generation(resource_id: int) -> None:
+    key = _slots_generation_key(resource_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def list_available_slots(
+    resource: Resource,
+    *,
+    rules: Iterable[AvailabilityRule] | None = None,
+    exceptions: Iterable[AvailabilityException] | None = None,
+    booked: Iterable[Booking] | None = None,
+    days_ahead: int = 14,
+) -> list[Slot]:
     tz = get_tz()
-    today_local = timezone.localdate()
-    rules = (
-        AvailabilityRule.objects.filter(resource=resource, is_active=True)
-        .only("weekday", "start_time_local", "end_time_local", "resource_id")
-        .order_by("weekday", "start_time_local")
-    )
+    now = timezone.now()
+    today_local = now.astimezone(tz).date()
+    if rules is not None or exceptions is not None or booked is not None:
+        return _compute_available_slots(
+            resource,
+            now,
+            days_ahead,
+            rules=rules,
+            exceptions=exceptions,
+            booked=None if booked is None else [booking.starts_at_utc for booking in booked],
+        )
+
+    generation = cache.get(_slots_generation_key(resource.id), 0)
+    key = slots_cache_key(resource.id, generation)
+    cached = cache.get(key)
+    if cached is None or cached["day"] != today_local.isoformat() or cached["days_ahead"] < days_ahead:
+        cached = {
+            "day": today_local.isoformat(),
+            "days_ahead": days_ahead,
+            "slots": [s.starts_utc.isoformat() for s in _compute_available_slots(resource, now, days_ahead)],
+        }
+        cache.set(key, cached, timeout=SLOTS_CACHE_TIMEOUT)
+
+    horizon_local = today_local + timedelta(days=days_ahead)
+    out: list[Slot] = []
+    for iso_utc in cached["slots"]:
+        starts_utc = datetime.fromisoformat(iso_utc)
+        if starts_utc < now:
+            continue
+        starts_local = starts_utc.astimezone(tz)
+        if starts_local.date() >= horizon_local:
+            break
+        out.append(Slot(starts_local=starts_local, starts_utc=starts_utc))
+    return out
+
+
+def _compute_available_slots(
+    resource: Resource,
+    now: datetime,
+    days_ahead: int,
+    *,
+    rules: Iterable[AvailabilityRule] | None = None,
+    exceptions: Iterable[AvailabilityException] | None = None,
+    booked: Iterable[datetime] | None = None,
+) -> list[Slot]:
+    tz = get_tz()
+    now_local = now.astimezone(tz)
+    booked_since = now - timedelta(days=1)
+    if rules is None and exceptions is None and booked is None:
+        rules, exceptions, booked = _fetch_availability(resource, booked_since)
+    else:
+        rules = _active_rules(resource) if rules is None else [rule for rule in rules if rule.is_active]
+        exceptions = _exceptions(resource) if exceptions is None else exceptions
+        booked = _booked_starts(resource, booked_since) if booked is None else booked
+
     rules_by_weekday: dict[int, list[AvailabilityRule]] = {}
     for rule in rules:
         rules_by_weekday.setdefault(rule.weekday, []).append(rule)
+    exceptions_by_day = {ex.date_local: ex for ex in exceptions}
 
-    exceptions = {
-        ex.date_local: ex
-        for ex in AvailabilityException.objects.filter(resource=resource).only(
-            "date_local",
-            "is_closed",
-            "start_time_local",
-            "end_time_local",
-            "resource_id",
-        )
-    }
-
-    window_days = daterange(today_local, days_ahead)
+    window_days = daterange(now_local.date(), days_ahead)
     out: list[Slot] = []
     for day_local in window_days:
-        exception = exceptions.get(day_local)
+        exception = exceptions_by_day.get(day_local)
         if exception is not None and exception.is_closed:
             continue
 
@@ -78,36 +155,128 @@ def list_available_slots(resource: Resource, days_ahead: int = 14) -> list[Slot]
                     start_t = exception.start_time_local
                     end_t = exception.end_time_local
 
-            for starts_local_naive in slot_starts_local(day_local, start_t, end_t):
-                starts_local = starts_local_naive.replace(tzinfo=tz)
-                if starts_local < timezone.now().astimezone(tz):
+            for starts_local in slot_starts_local(day_local, start_t, end_t, tz):
+                if starts_local < now_local:
                     continue
                 out.append(Slot(starts_local=starts_local, starts_utc=to_utc(starts_local)))
 
-    booked = set(
-        Booking.objects.filter(
-            resource=resource,
-            starts_at_utc__gte=timezone.now() - timedelta(days=1),
-        ).values_list("starts_at_utc", flat=True)
+    booked_ts = {int(starts_at.timestamp()) for starts_at in booked}
+    return [s for s in out if int(s.starts_utc.timestamp()) not in booked_ts]
+
+
+def _active_rules(resource: Resource) -> Iterable[AvailabilityRule]:
+    return (
+        AvailabilityRule.objects.filter(resource=resource, is_active=True)
+        .only("weekday", "start_time_local", "end_time_local", "resource_id")
+        .order_by("weekday", "start_time_local")
+    )
+
+
+def _exceptions(resource: Resource) -> Iterable[AvailabilityException]:
+    return AvailabilityException.objects.filter(resource=resource).only(
+        "date_local",
+        "is_closed",
+        "start_time_local",
+        "end_time_local",
+        "resource_id",
     )
-    return [s for s in out if s.starts_utc not in booked]
 
 
-def user_daily_booking_count(user: User, day_local: date) -> int:
+def _booked_starts(resource: Resource, since: datetime) -> Iterable[datetime]:
+    return Booking.objects.filter(
+        resource=resource,
+        starts_at_utc__gte=since,
+    ).values_list("starts_at_utc", flat=True)
+
+
+_AVAILABILITY_SQL = f"""
+WITH r AS (
+    SELECT weekday, start_time_local, end_time_local
+    FROM {AvailabilityRule._meta.db_table}
+    WHERE resource_id = %s AND is_active
+), e AS (
+    SELECT date_local, is_closed, start_time_local, end_time_local
+    FROM {AvailabilityException._meta.db_table}
+    WHERE resource_id = %s
+), b AS (
+    SELECT starts_at_utc
+    FROM {Booking._meta.db_table}
+    WHERE resource_id = %s AND starts_at_utc >= %s
+)
+SELECT 'r', weekday, NULL::date, NULL::boolean, start_time_local, end_time_local, NULL::timestamptz FROM r
+UNION ALL
+SELECT 'e', NULL, date_local, is_closed, start_time_local, end_time_local, NULL FROM e
+UNION ALL
+SELECT 'b', NULL, NULL, NULL, NULL, NULL, starts_at_utc FROM b
+"""
+
+
+def _fetch_availability(
+    resource: Resource,
+    booked_since: datetime,
+) -> tuple[Iterable[AvailabilityRule], Iterable[AvailabilityException], Iterable[datetime]]:
+    if connection.vendor != "postgresql":
+        return _active_rules(resource), _exceptions(resource), _booked_starts(resource, booked_since)
+
+    with connection.cursor() as cursor:
+        cursor.execute(_AVAILABILITY_SQL, [resource.id, resource.id, resource.id, booked_since])
+        rows = cursor.fetchall()
+
+    rules: list[AvailabilityRule] = []
+    exceptions: list[AvailabilityException] = []
+    booked: list[datetime] = []
+    for kind, weekday, date_local, is_closed, start_t, end_t, starts_at_utc in rows:
+        if kind == "r":
+            rules.append(
+                AvailabilityRule(
+                    resource_id=resource.id,
+                    weekday=weekday,
+                    start_time_local=start_t,
+                    end_time_local=end_t,
+                    is_active=True,
+                )
+            )
+        elif kind == "e":
+            exceptions.append(
+                AvailabilityException(
+                    resource_id=resource.id,
+                    date_local=date_local,
+                    is_closed=is_closed,
+                    start_time_local=start_t,
+                    end_time_local=end_t,
+                )
+            )
+        else:
+            booked.append(starts_at_utc)
+    rules.sort(key=lambda rule: (rule.weekday, rule.start_time_local))
+    return rules, exceptions, booked
+
+
+def user_daily_booking_count(user: User, day_local: date, limit: int = DAILY_BOOKING_LIMIT) -> int:
     tz = get_tz()
     start_local = datetime.combine(day_local, datetime.min.time()).replace(tzinfo=tz)
     end_local = start_local + timedelta(days=1)
     start_utc = to_utc(start_local)
     end_utc = to_utc(end_local)
-    return Booking.objects.filter(
-        user=user,
-        starts_at_utc__gte=start_utc,
-        starts_at_utc__lt=end_utc,
-    ).count()
+    return len(
+        Booking.objects.filter(
+            user=user,
+            starts_at_utc__gte=start_utc,
+            starts_at_utc__lt=end_utc,
+        )
+        .order_by()
+        .values_list("id")[:limit]
+    )
 
 
-def _lock_key(resource_id: int, starts_at_utc: datetime) -> str:
-    return f"booking_lock:{resource_id}:{int(starts_at_utc.timestamp())}"
+def _lock_slot(resource_id: int, starts_at_utc: datetime) -> None:
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock(hashtextextended(%s, 0))",
+            [f"booking:{resource_id}:{int(starts_at_utc.timestamp())}"],
+        )
 
 
 def create_booking(
@@ -121,22 +290,23 @@ def create_booking(
     starts_local = timezone.localtime(starts_at_utc, tz)
     day_local = starts_local.date()
 
-    if user_daily_booking_count(user, day_local) >= 5:
-        raise ValueError("Daily booking limit reached (max 5/day).")
-
-    key = _lock_key(resource.id, starts_at_utc)
-    with cache.lock(key, timeout=10, blocking_timeout=5):
-        try:
-            with transaction.atomic():
-                booking = Booking.objects.create(
-                    user=user,
-                    resource=resource,
-                    starts_at_utc=starts_at_utc,
-                )
-        except IntegrityError as exc:
-            raise ValueError("This slot is already booked.") from exc
+    if user_daily_booking_count(user, day_local) >= DAILY_BOOKING_LIMIT:
+        raise ValueError(f"Daily booking limit reached (max {DAILY_BOOKING_LIMIT}/day).")
+
+    try:
+        with transaction.atomic():
+            _lock_slot(resource.id, starts_at_utc)
+            booking = Booking.objects.create(
+                user=user,
+                resource=resource,
+                starts_at_utc=starts_at_utc,
+            )
+            transaction.on_commit(
+                lambda: _email_executor.submit(send_booking_email_task, str(booking.id), request_host)
+            )
+    except IntegrityError as exc:
+        raise ValueError("This slot is already booked.") from exc
 
-    send_booking_email(booking=booking, request_host=request_host)
     return booking
 
 
@@ -146,11 +316,29 @@ def cancel_booking(*, booking: Booking, acting_user: User) -> None:
     booking.delete()
 
 
+ICS_TEMPLATE = (
+    "BEGIN:VCALENDAR\r\n"
+    "VERSION:2.0\r\n"
+    "PRODID:-//Scheduler Platform//EN\r\n"
+    "CALSCALE:GREGORIAN\r\n"
+    "METHOD:PUBLISH\r\n"
+    "BEGIN:VEVENT\r\n"
+    "UID:{uid}\r\n"
+    "DTSTAMP:{stamp}\r\n"
+    "DTSTART:{start}\r\n"
+    "DTEND:{end}\r\n"
+    "SUMMARY:{summary}\r\n"
+    "DESCRIPTION:{desc}\r\n"
+    "{url_line}"
+    "END:VEVENT\r\n"
+    "END:VCALENDAR\r\n"
+)
+
+
 def _ics_dt(dt_utc: datetime) -> str:
     if timezone.is_naive(dt_utc):
-        dt_utc = dt_utc.replace(tzinfo=timezone.utc)
-    dt_utc = dt_utc.astimezone(timezone.utc)
-    return dt_utc.strftime("%Y%m%dT%H%M%SZ")
+        dt_utc = dt_utc.replace(tzinfo=dt_timezone.utc)
+    return dt_utc.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
 
 
 def _ics_escape(value: str) -> str:
@@ -161,55 +349,59 @@ def _ics_escape(value: str) -> str:
         .replace("\n", "\\n")
     )
 
+
 def build_ics_bytes(booking, request_host: str | None) -> bytes:
-    uid = f"{booking.id}@scheduler-platform"
-    dtstamp = _ics_dt(timezone.now())
-    dtstart = _ics_dt(booking.starts_at_utc)
-    dtend = _ics_dt(booking.ends_at_utc)
-
-    summary = _ics_escape(f"Appointment: {booking.resource.name}")
-    description = _ics_escape(f"Resource: {booking.resource.name}")
-    url_line = ""
-    if request_host:
-        url_line = f"URL:https://{_ics_escape(request_host)}/booking/\r\n"
-
-    ics = (
-        "BEGIN:VCALENDAR\r\n"
-        "VERSION:2.0\r\n"
-        "PRODID:-//Scheduler Platform//EN\r\n"
-        "CALSCALE:GREGORIAN\r\n"
-        "METHOD:PUBLISH\r\n"
-        "BEGIN:VEVENT\r\n"
-        f"UID:{uid}\r\n"
-        f"DTSTAMP:{dtstamp}\r\n"
-        f"DTSTART:{dtstart}\r\n"
-        f"DTEND:{dtend}\r\n"
-        f"SUMMARY:{summary}\r\n"
-        f"DESCRIPTION:{description}\r\n"
-        f"{url_line}"
-        "END:VEVENT\r\n"
-        "END:VCALENDAR\r\n"
-    )
-    return ics.encode("utf-8")
+    name = _ics_escape(booking.resource.name)
+    url_line = f"URL:https://{_ics_escape(request_host)}/booking/\r\n" if request_host else ""
+    return ICS_TEMPLATE.format(
+        uid=f"{booking.id}@scheduler-platform",
+        stamp=_ics_dt(timezone.now()),
+        start=_ics_dt(booking.starts_at_utc),
+        end=_ics_dt(booking.ends_at_utc),
+        summary=f"Appointment: {name}",
+        desc=f"Resource: {name}",
+        url_line=url_line,
+    ).encode("utf-8")
 
 
 def send_booking_email(*, booking: Booking, request_host: str | None) -> None:
-    subject = "Your appointment is confirmed"
-    starts_local = booking.starts_at_local()
-    ends_local = booking.ends_at_local()
-    body = (
-        "Your appointment is confirmed.\n\n"
-        f"Resource: {booking.resource.name}\n"
-        f"Starts (local): {starts_local:%Y-%m-%d %H:%M}\n"
-        f"Ends (local): {ends_local:%Y-%m-%d %H:%M}\n"
-        "\n"
-        "ICS file is attached for Google Calendar import."
-    )
-    msg = EmailMessage(
-        subject=subject,
-        body=body,
-        to=[booking.user.email],
-    )
-    ics_bytes = build_ics_bytes(booking, request_host)
-    msg.attach(filename="appointment.ics", content=ics_bytes, mimetype="text/calendar")
-    msg.send(fail_silently=True)
\ No newline at end of file
+    key = f"emailed:{booking.id}"
+    if not cache.add(key, 1, timeout=BOOKING_EMAIL_DEDUP_TIMEOUT):
+        return
+
+    try:
+        subject = "Your appointment is confirmed"
+        starts_local = booking.starts_at_local()
+        ends_local = booking.ends_at_local()
+        body = (
+            "Your appointment is confirmed.\n\n"
+            f"Resource: {booking.resource.name}\n"
+            f"Starts (local): {starts_local:%Y-%m-%d %H:%M}\n"
+            f"Ends (local): {ends_local:%Y-%m-%d %H:%M}\n"
+            "\n"
+            "ICS file is attached for Google Calendar import."
+        )
+        msg = EmailMessage(
+            subject=subject,
+            body=body,
+            to=[booking.user.email],
+        )
+        ics_bytes = build_ics_bytes(booking, request_host)
+        msg.attach(filename="appointment.ics", content=ics_bytes, mimetype="text/calendar")
+        msg.send()
+    except Exception:
+        cache.delete(key)
+        raise
+
+
+def send_booking_email_task(booking_id: str, request_host: str | None) -> None:
+    close_old_connections()
+    try:
+        booking = Booking.objects.select_related("resource", "user").filter(pk=booking_id).first()
+        if booking is None:
+            return
+        send_booking_email(booking=booking, request_host=request_host)
+    except Exception:
+        logger.exception("Failed to send confirmation email for booking %s", booking_id)
+    finally:
+        connections.close_all()
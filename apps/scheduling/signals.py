@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import AvailabilityException, AvailabilityRule, Booking
+from .services import bump_slots_generation
+
+
+@receiver(post_save, sender=AvailabilityRule)
+@receiver(post_delete, sender=AvailabilityRule)
+@receiver(post_save, sender=AvailabilityException)
+@receiver(post_delete, sender=AvailabilityException)
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_available_slots(sender, instance, **kwargs) -> None:
+    resource_id = instance.resource_id
+    transaction.on_commit(lambda: bump_slots_generation(resource_id))
@@ -1,34 +1,79 @@
 from __future__ import annotations
 
+import hashlib
+
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.contrib.messages import get_messages
+from django.core.paginator import Paginator
 from django.http import Http404, HttpRequest, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
+from django.utils.cache import add_never_cache_headers, get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.views.decorators.cache import cache_control, cache_page
+from django.views.decorators.vary import vary_on_cookie
 
 from .forms import BookingCreateForm
 from .models import Booking, Resource
-from .services import cancel_booking, create_booking, list_available_slots
+from .services import Slot, cancel_booking, create_booking, list_available_slots
+
+BOOKINGS_PER_PAGE = 50
 
 
+@cache_page(60)
+@vary_on_cookie
 def resource_list(request: HttpRequest) -> HttpResponse:
+    has_messages = bool(len(get_messages(request)))
     resources = (
         Resource.objects.filter(is_active=True)
-        .select_related("owner")
-        .only("id", "name", "description", "owner_id", "is_active")
+        .only("id", "name", "description")
         .order_by("name")
     )
-    return render(request, "scheduling/resource_list.html", {"resources": resources})
-
-
+    response = render(request, "scheduling/resource_list.html", {"resources": resources})
+    if has_messages:
+        add_never_cache_headers(response)
+    else:
+        patch_cache_control(response, public=True, max_age=60)
+    return response
+
+
+def _resource_etag(request: HttpRequest, resource: Resource, slots: list[Slot]) -> str | None:
+    if len(get_messages(request)):
+        return None
+    digest = hashlib.md5(usedforsecurity=False)
+    for part in (
+        resource.pk,
+        resource.name,
+        resource.description,
+        request.user.pk,
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME),
+    ):
+        digest.update(f"{part}\x1f".encode())
+    for slot in slots:
+        digest.update(slot.starts_utc.isoformat().encode())
+    return quote_etag(digest.hexdigest())
+
+
+@cache_control(private=True, no_cache=True)
 def resource_detail(request: HttpRequest, resource_id: int) -> HttpResponse:
-    resource = get_object_or_404(Resource.objects.select_related("owner"), pk=resource_id, is_active=True)
+    resource = get_object_or_404(Resource, pk=resource_id, is_active=True)
     slots = list_available_slots(resource, days_ahead=14)
-    return render(
+    etag = _resource_etag(request, resource, slots)
+    if etag is not None:
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified["ETag"] = etag
+            return not_modified
+    response = render(
         request,
         "scheduling/resource_detail.html",
         {"resource": resource, "slots": slots},
     )
+    if etag is not None:
+        response["ETag"] = etag
+    return response
 
 
 @login_required
@@ -59,7 +104,7 @@ def booking_create(request: HttpRequest, resource_id: int) -> HttpResponse:
 @login_required
 def booking_success(request: HttpRequest, booking_id) -> HttpResponse:
     booking = get_object_or_404(
-        Booking.objects.select_related("resource", "user", "resource__owner"),
+        Booking.objects.select_related("resource").only("id", "starts_at_utc", "resource_id", "resource__name"),
         pk=booking_id,
         user=request.user,
     )
@@ -69,7 +114,7 @@ def booking_success(request: HttpRequest, booking_id) -> HttpResponse:
 @login_required
 def booking_cancel(request: HttpRequest, booking_id) -> HttpResponse:
     booking = get_object_or_404(
-        Booking.objects.select_related("resource", "resource__owner"),
+        Booking.objects.select_related("resource").only("id", "user_id", "resource_id", "resource__owner_id"),
         pk=booking_id,
     )
     try:
@@ -84,11 +129,16 @@ def booking_cancel(request: HttpRequest, booking_id) -> HttpResponse:
 def my_bookings(request: HttpRequest) -> HttpResponse:
     bookings = (
         Booking.objects.filter(user=request.user)
-        .select_related("resource", "resource__owner")
-        .only("id", "starts_at_utc", "resource_id", "resource__name", "resource__owner_id")
-        .order_by("-starts_at_utc")
+        .select_related("resource")
+        .only("id", "starts_at_utc", "resource_id", "resource__name")
+        .order_by("-starts_at_utc", "-id")
+    )
+    page = Paginator(bookings, BOOKINGS_PER_PAGE).get_page(request.GET.get("page"))
+    return render(
+        request,
+        "scheduling/my_bookings.html",
+        {"bookings": page.object_list, "page_obj": page},
     )
-    return render(request, "scheduling/my_bookings.html", {"bookings": bookings})
 
 
 @login_required
@@ -97,6 +147,11 @@ def manager_bookings(request: HttpRequest) -> HttpResponse:
         Booking.objects.filter(resource__owner=request.user)
         .select_related("resource", "user")
         .only("id", "starts_at_utc", "resource_id", "resource__name", "user_id", "user__email")
-        .order_by("-starts_at_utc")
+        .order_by("-starts_at_utc", "-id")
     )
-    return render(request, "scheduling/manager_bookings.html", {"bookings": bookings})
\ No newline at end of file
+    page = Paginator(bookings, BOOKINGS_PER_PAGE).get_page(request.GET.get("page"))
+    return render(
+        request,
+        "scheduling/manager_bookings.html",
+        {"bookings": page.object_list, "page_obj": page},
+    )
\ No newline at end of file
@@ -168,7 +168,10 @@ CACHES = {
     }
 }
 
-SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+SESSION_ENGINE = _env(
+    "DJANGO_SESSION_ENGINE",
+    "django.contrib.sessions.backends.signed_cookies",
+)
 
 
 """